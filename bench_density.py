@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Measures the per-user memory footprint and per-request allocation cost of
+the Neo4jUser hot path, without needing a Neo4j server.
+
+Users are started for real (greenlet, on_start and all) and left parked in
+their wait_time, just like the idle majority of a big swarm.
+
+The driver behind the shared Neo4jClient is swapped for an in-process fake
+so only the harness's own overhead is measured.
+"""
+import argparse
+import gc
+import tracemalloc
+
+import gevent
+import psutil
+
+from gevent.pool import Group
+from locust import constant, task
+from locust.env import Environment
+
+from users import Neo4jUser
+from users.base import Neo4jClient, Neo4jPool
+
+from typing import Any, List, Tuple
+
+
+class FakeResult:
+    def __init__(self, rows: int):
+        self.rows = tuple(range(rows))
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def consume(self) -> None:
+        return None
+
+
+class FakeInbox:
+    def __init__(self) -> None:
+        self._socket = None
+
+
+class FakeConnection:
+    def __init__(self) -> None:
+        self.inbox = FakeInbox()
+
+
+class FakeTx:
+    def __init__(self, rows: int):
+        self.result = FakeResult(rows)
+        self._connection = FakeConnection()
+
+    def run(self, *args: Any, **kwargs: Any) -> FakeResult:
+        return self.result
+
+
+class FakeSession:
+    def __init__(self, rows: int):
+        self.tx = FakeTx(rows)
+
+    def __enter__(self) -> "FakeSession":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        return None
+
+    def _call(self, fn: Any, *args: Any, **kwargs: Any) -> Any:
+        return fn(self.tx, *args, **kwargs)
+
+    execute_read = execute_write = _call
+    read_transaction = write_transaction = _call
+
+
+class FakeDriver:
+    def __init__(self, rows: int):
+        self._session = FakeSession(rows)
+
+    def session(self, **kwargs: Any) -> FakeSession:
+        return self._session
+
+    def close(self) -> None:
+        pass
+
+
+class BenchUser(Neo4jUser):
+    """Parks after one no-op task; requests are driven by the benchmark."""
+    host = "neo4j://localhost:7687"
+    wait_time = constant(3600)
+
+    @task
+    def noop(self) -> None:
+        pass
+
+
+def measure_users(env: Environment, group: Group,
+                  n: int) -> Tuple[float, float, List[BenchUser]]:
+    process = psutil.Process()
+    gc.collect()
+    rss_before = process.memory_info().rss
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    population = [BenchUser(env) for _ in range(n)]
+    for user in population:
+        user.start(group)
+    gevent.sleep(0)  # let every user run on_start and park in wait_time
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = process.memory_info().rss
+    return (after - before) / n, (rss_after - rss_before) / n, population
+
+
+def measure_requests(user: Neo4jUser, n: int) -> Tuple[float, float]:
+    cypher = "UNWIND range(1, 10) AS x RETURN x"
+    for _ in range(100):
+        user.read(cypher, nodeId=1)  # warm up any lazy caches
+    gc.collect()
+    gc.disable()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    peak_total = 0
+    for _ in range(n):
+        tracemalloc.reset_peak()
+        user.read(cypher, nodeId=1)
+        _, peak = tracemalloc.get_traced_memory()
+        peak_total += peak - base
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.enable()
+    return peak_total / n, (current - base) / n
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", default=10_000, type=int)
+    parser.add_argument("--requests", default=10_000, type=int)
+    parser.add_argument("--rows", default=10, type=int)
+    parser.add_argument("--high-density", action="store_true")
+    args = parser.parse_args()
+
+    options = argparse.Namespace(
+        neo4j_user="neo4j", neo4j_pass="password",
+        neo4j_high_density=args.high_density,
+    )
+    env = Environment(host=BenchUser.host, parsed_options=options,
+                      user_classes=[BenchUser])
+
+    client = Neo4jPool.acquire(BenchUser.host, ("neo4j", "password"))
+    client.driver.close()
+    client.driver = FakeDriver(args.rows)  # type: ignore
+
+    group = Group()
+    per_user, rss_per_user, population = \
+        measure_users(env, group, args.users)
+    peak, retained = measure_requests(population[0], args.requests)
+    group.kill()
+
+    mode = "high-density" if args.high_density else "default"
+    print(f"mode:                      {mode}")
+    print(f"memory per user:           {per_user:,.0f} bytes")
+    print(f"RSS per user:              {rss_per_user:,.0f} bytes")
+    print(f"transient bytes / request: {peak:,.0f} bytes")
+    print(f"retained bytes / request:  {retained:,.2f} bytes")
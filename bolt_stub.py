@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+A tiny stand-in Bolt server for exercising the harness without Neo4j.
+
+Speaks just enough Bolt 5.0 for the Python driver: handshake, HELLO, ROUTE,
+explicit and auto-commit transactions, and PULL/DISCARD paging. Queries
+that ask for a max(...), like the ones users run to find their id range,
+get a single integer back. Every other query returns the same canned rows,
+and each connection phase can be slowed down to mimic an overloaded server.
+"""
+import argparse
+import logging
+import re
+import socketserver
+import struct
+import time
+
+from typing import Any, List, Tuple
+
+
+MAGIC = b"\x60\x60\xB0\x17"
+BOLT_5_0 = b"\x00\x00\x00\x05"
+
+HELLO, GOODBYE, RESET = 0x01, 0x02, 0x0F
+RUN, BEGIN, COMMIT, ROLLBACK = 0x10, 0x11, 0x12, 0x13
+DISCARD, PULL, ROUTE = 0x2F, 0x3F, 0x66
+SUCCESS, RECORD, FAILURE = 0x70, 0x71, 0x7F
+
+# e.g. "MATCH (p:Person) RETURN max(p.id) AS maxId"
+MAX_QUERY = re.compile(r"\bRETURN\s+max\(", re.IGNORECASE)
+
+
+class Structure:
+    def __init__(self, tag: int, *fields: Any):
+        self.tag = tag
+        self.fields = fields
+
+
+def pack(value: Any) -> bytes:
+    """Just enough PackStream to describe the rows and metadata we send."""
+    if value is None:
+        return b"\xC0"
+    if value is True:
+        return b"\xC3"
+    if value is False:
+        return b"\xC2"
+    if isinstance(value, int):
+        if -16 <= value < 128:
+            return struct.pack(">b", value)
+        if -0x8000 <= value < 0x8000:
+            return b"\xC9" + struct.pack(">h", value)
+        if -0x80000000 <= value < 0x80000000:
+            return b"\xCA" + struct.pack(">i", value)
+        return b"\xCB" + struct.pack(">q", value)
+    if isinstance(value, float):
+        return b"\xC1" + struct.pack(">d", value)
+    if isinstance(value, str):
+        data = value.encode("utf-8")
+        return _header(len(data), 0x80, 0xD0) + data
+    if isinstance(value, (list, tuple)):
+        return _header(len(value), 0x90, 0xD4) + \
+            b"".join(pack(v) for v in value)
+    if isinstance(value, dict):
+        return _header(len(value), 0xA0, 0xD8) + b"".join(
+            pack(k) + pack(v) for k, v in value.items()
+        )
+    if isinstance(value, Structure):
+        return bytes([0xB0 + len(value.fields), value.tag]) + \
+            b"".join(pack(v) for v in value.fields)
+    raise TypeError(f"can't pack {type(value)}")
+
+
+def _header(size: int, tiny: int, sized: int) -> bytes:
+    if size < 16:
+        return bytes([tiny + size])
+    if size < 0x100:
+        return bytes([sized, size])
+    if size < 0x10000:
+        return bytes([sized + 1]) + struct.pack(">H", size)
+    return bytes([sized + 2]) + struct.pack(">I", size)
+
+
+def unpack(data: bytes, p: int = 0) -> Tuple[Any, int]:
+    marker = data[p]
+    p += 1
+    if marker < 0x80:
+        return marker, p
+    if marker >= 0xF0:
+        return marker - 0x100, p
+    if marker == 0xC0:
+        return None, p
+    if marker in (0xC2, 0xC3):
+        return marker == 0xC3, p
+    if marker == 0xC1:
+        return struct.unpack_from(">d", data, p)[0], p + 8
+    if 0xC8 <= marker <= 0xCB:
+        fmt, width = {0xC8: (">b", 1), 0xC9: (">h", 2),
+                      0xCA: (">i", 4), 0xCB: (">q", 8)}[marker]
+        return struct.unpack_from(fmt, data, p)[0], p + width
+    kind, size, p = _size(data, marker, p)
+    if kind == "str":
+        return data[p:p + size].decode("utf-8"), p + size
+    if kind == "list":
+        items = []
+        for _ in range(size):
+            item, p = unpack(data, p)
+            items.append(item)
+        return items, p
+    if kind == "map":
+        entries = {}
+        for _ in range(size):
+            key, p = unpack(data, p)
+            entries[key], p = unpack(data, p)
+        return entries, p
+    tag = data[p]
+    p += 1
+    fields = []
+    for _ in range(size):
+        item, p = unpack(data, p)
+        fields.append(item)
+    return Structure(tag, *fields), p
+
+
+def _size(data: bytes, marker: int, p: int) -> Tuple[str, int, int]:
+    for kind, tiny, sized in (("str", 0x80, 0xD0), ("list", 0x90, 0xD4),
+                              ("map", 0xA0, 0xD8), ("struct", 0xB0, None)):
+        if tiny <= marker < tiny + 16:
+            return kind, marker - tiny, p
+        if sized is not None and sized <= marker <= sized + 2:
+            width = 1 << (marker - sized)
+            fmt = {1: ">B", 2: ">H", 4: ">I"}[width]
+            return kind, struct.unpack_from(fmt, data, p)[0], p + width
+    raise ValueError(f"unsupported marker 0x{marker:02X}")
+
+
+def canned_path(row: int, width: int) -> Structure:
+    """A 3 hop path, like `MATCH p=(n)-[*1..3]-() RETURN p` would give."""
+    props = {"name": "x" * width}
+    nodes = [Structure(0x4E, row * 4 + i, ["Node"], props, str(row * 4 + i))
+             for i in range(4)]
+    rels = [Structure(0x72, row * 3 + i, "KNOWS", {}, str(row * 3 + i))
+            for i in range(3)]
+    return Structure(0x50, nodes, rels, [1, 1, 2, 2, 3, 3])
+
+
+class BoltStubHandler(socketserver.BaseRequestHandler):
+    server: "BoltStubServer"
+
+    def setup(self) -> None:
+        self.total = 0
+        self.remaining = 0
+        self.max_id = False # answering a max(...) query?
+
+    def recv_exactly(self, n: int) -> bytes:
+        data = b""
+        while len(data) < n:
+            chunk = self.request.recv(n - len(data))
+            if not chunk:
+                raise ConnectionError("client went away")
+            data += chunk
+        return data
+
+    def recv_message(self) -> Tuple[int, List[Any]]:
+        data = b""
+        while True:
+            size = struct.unpack(">H", self.recv_exactly(2))[0]
+            if size == 0:
+                if data:
+                    break
+                continue # NOOP
+            data += self.recv_exactly(size)
+        message, _ = unpack(data)
+        return message.tag, list(message.fields)
+
+    def send(self, tag: int, *fields: Any) -> None:
+        data = pack(Structure(tag, *fields))
+        out = bytearray()
+        for i in range(0, len(data), 0xFFFF):
+            chunk = data[i:i + 0xFFFF]
+            out += struct.pack(">H", len(chunk)) + chunk
+        self.request.sendall(bytes(out) + b"\x00\x00")
+
+    def stall(self, ms: float) -> None:
+        if ms > 0:
+            time.sleep(ms / 1000)
+
+    def handle(self) -> None:
+        opts = self.server.options
+        if self.recv_exactly(4) != MAGIC:
+            return
+        self.recv_exactly(16)
+        self.stall(opts.handshake_delay)
+        self.request.sendall(BOLT_5_0)
+
+        try:
+            while True:
+                tag, fields = self.recv_message()
+                if tag == GOODBYE:
+                    return
+                self.dispatch(tag, fields)
+        except ConnectionError:
+            pass
+
+    def dispatch(self, tag: int, fields: List[Any]) -> None:
+        opts = self.server.options
+        if tag == HELLO:
+            self.stall(opts.hello_delay)
+            self.send(SUCCESS, {"server": "Neo4j/5.5.0",
+                                "connection_id": "bolt-stub"})
+        elif tag == ROUTE:
+            self.stall(opts.route_delay)
+            address = f"{opts.advertised_host}:{opts.port}"
+            self.send(SUCCESS, {"rt": {
+                "ttl": 300, "db": "neo4j",
+                "servers": [
+                    {"addresses": [address], "role": role}
+                    for role in ("ROUTE", "READ", "WRITE")
+                ],
+            }})
+        elif tag == RUN:
+            self.max_id = bool(MAX_QUERY.search(fields[0]))
+            self.total = 1 if self.max_id else opts.rows
+            self.remaining = self.total
+            self.send(SUCCESS, {"fields": ["p"], "t_first": 0})
+        elif tag == PULL:
+            n = fields[0].get("n", -1)
+            batch = self.remaining if n < 0 else min(n, self.remaining)
+            start = self.total - self.remaining
+            for row in range(start, start + batch):
+                value = opts.max_id if self.max_id else self.server.row(row)
+                self.send(RECORD, [value])
+            self.remaining -= batch
+            if self.remaining:
+                self.send(SUCCESS, {"has_more": True})
+            else:
+                self.send(SUCCESS, {"type": "r", "t_last": 0, "db": "neo4j"})
+        elif tag == DISCARD:
+            self.remaining = 0
+            self.send(SUCCESS, {"type": "r", "t_last": 0, "db": "neo4j"})
+        elif tag == COMMIT:
+            self.send(SUCCESS, {"bookmark": "bolt-stub:1"})
+        elif tag in (BEGIN, ROLLBACK, RESET):
+            self.send(SUCCESS, {})
+        else:
+            self.send(FAILURE, {
+                "code": "Neo.ClientError.Request.Invalid",
+                "message": f"bolt stub can't handle message 0x{tag:02X}",
+            })
+
+
+class BoltStubServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+    # big enough that reconnect storms don't trip over the listen backlog
+    request_queue_size = 1024
+
+    def __init__(self, options: argparse.Namespace):
+        super().__init__((options.host, options.port), BoltStubHandler)
+        self.options = options
+        self.options.port = self.server_address[1]
+
+    def row(self, row: int) -> Any:
+        if self.options.paths:
+            return canned_path(row, self.options.width)
+        return "x" * self.options.width
+
+
+def parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", default=7687, type=int)
+    p.add_argument("--advertised-host", default="127.0.0.1",
+                   help="host handed out in routing tables")
+    p.add_argument("--rows", default=10, type=int,
+                   help="rows returned by every query")
+    p.add_argument("--width", default=16, type=int,
+                   help="bytes of string data per row (or per node)")
+    p.add_argument("--paths", action="store_true",
+                   help="return 3 hop paths instead of strings")
+    p.add_argument("--max-id", default=1000, type=int,
+                   help="answer to any RETURN max(...) query")
+    p.add_argument("--handshake-delay", default=0.0, type=float,
+                   help="ms to stall before agreeing a protocol version")
+    p.add_argument("--hello-delay", default=0.0, type=float,
+                   help="ms to stall before answering HELLO (auth)")
+    p.add_argument("--route-delay", default=0.0, type=float,
+                   help="ms to stall before answering ROUTE")
+    return p
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    server = BoltStubServer(parser().parse_args())
+    logging.info(f"bolt stub listening on {server.server_address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Smoke test for ChurnUser against an in-process bolt_stub, so it doesn't need
+a Neo4j server. Connects once (and once more after a reconnect storm) and
+checks that the handshake, auth and route phases were each timed without
+errors.
+"""
+import argparse
+import sys
+import threading
+
+import gevent
+
+from locust.env import Environment
+
+from bolt_stub import BoltStubServer, parser as stub_parser
+from users import ChurnUser
+from users.churn import ReconnectStorm
+
+from typing import Any, Dict, List
+
+
+PHASES = ("handshake", "auth", "route")
+
+
+def main() -> int:
+    stub = BoltStubServer(stub_parser().parse_args(["--port", "0"]))
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    host = f"neo4j://127.0.0.1:{stub.options.port}"
+
+    options = argparse.Namespace(
+        neo4j_user="neo4j", neo4j_pass="password", neo4j_churn_rate=0.0,
+    )
+    env = Environment(host=host, parsed_options=options,
+                      user_classes=[ChurnUser])
+    events: List[Dict[str, Any]] = []
+
+    def on_request(**kwargs: Any) -> None:
+        events.append(kwargs)
+
+    env.events.request.add_listener(on_request)
+
+    user = ChurnUser(env)
+    user.host = host # a runner would set this from env.host
+    try:
+        user.on_start()
+        # churn_rate is 0, so churn() only reconnects once the storm hits
+        gevent.spawn_later(0.1, ReconnectStorm.trigger)
+        user.churn()
+    finally:
+        user.on_stop()
+        stub.shutdown()
+        stub.server_close()
+
+    failed = False
+    for phase in PHASES:
+        seen = [e for e in events if e["name"] == phase]
+        errors = [e["exception"] for e in seen if e["exception"]]
+        print(f"{phase:<10} {len(seen)} timed, {len(errors)} failed")
+        if len(seen) != 2 or errors:
+            failed = True
+            for err in errors:
+                print(f"  {err!r}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
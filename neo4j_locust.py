@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import argparse
 import logging
+import signal
 import sys
 from os import cpu_count, environ, getpid
 
@@ -15,6 +16,13 @@ from locust.util.load_locustfile import is_user_class
 from locust.util.timespan import parse_timespan
 
 import users
+from users.churn import on_storm_message, trigger_storm, STORM_MESSAGE
+from users.stats import (
+    add_listeners as add_stats_listeners, print_throughput, throughput_printer
+)
+from users.timeseries import (
+    parse_retention, serve, TimeSeries, DEFAULT_RETENTION
+)
 
 from typing import cast, List, Optional, Tuple, Type
 
@@ -37,11 +45,13 @@ def worker(neo4j_uri: str, args: argparse.Namespace,
     pid = getpid()
     env = Environment(host=neo4j_uri, parsed_options=args,
                       user_classes=user_classes)
+    add_stats_listeners(env.events)
 
     host, port = args.master_host, args.master_port
     logging.info(f"worker({pid}) connecting to parent @ {host}:{port}")
 
     runner = env.create_worker_runner(host, port)
+    runner.register_message(STORM_MESSAGE, on_storm_message)
     logging.info(f"worker({pid}) created runner")
 
     try:
@@ -51,6 +61,12 @@ def worker(neo4j_uri: str, args: argparse.Namespace,
     sys.exit(0)
 
 
+def storm_every(runner, seconds: float) -> None:
+    while True:
+        gevent.sleep(seconds)
+        trigger_storm(runner)
+
+
 def stop_test(runner) -> None:
     logging.info("stopping test")
     try:
@@ -77,6 +93,13 @@ if __name__ == "__main__":
     neo4j_group.add_argument("--neo4j-user", default="neo4j")
     neo4j_group.add_argument("--neo4j-pass", default="password")
     neo4j_group.add_argument("--workers", default=cpu_count(), type=int)
+    neo4j_group.add_argument("--neo4j-high-density", action="store_true")
+    neo4j_group.add_argument("--neo4j-churn-rate", default=1.0, type=float)
+    neo4j_group.add_argument("--neo4j-storm-every", default=0, type=float)
+    neo4j_group.add_argument("--neo4j-metrics-port", default=0, type=int)
+    neo4j_group.add_argument("--neo4j-metrics-retention",
+                             default=DEFAULT_RETENTION)
+    neo4j_group.add_argument("--neo4j-metrics-file", default=None)
     neo4j_group.add_argument("--debug", action="store_true")
     setup_parser_arguments(parser)
     args = parser.parse_args()
@@ -95,6 +118,12 @@ if __name__ == "__main__":
             logging.error("invalid run time")
             sys.exit(1)
 
+    try:
+        retention = parse_retention(args.neo4j_metrics_retention)
+    except ValueError as e:
+        logging.error(f"invalid metrics retention: {e}")
+        sys.exit(1)
+
     # Find our user classes
     available_user_classes = {
         name: value for name, value in vars(users).items()
@@ -123,8 +152,16 @@ if __name__ == "__main__":
                       host=args.neo4j_uri,
                       tags=args.tags,
                       parsed_options=args)
+    add_stats_listeners(env.events)
     runner = env.create_master_runner()
 
+    # rolling per-query time series, for spotting slow degradation
+    timeseries = TimeSeries(retention)
+    env.events.worker_report.add_listener(timeseries.on_worker_report)
+    gevent.spawn(timeseries.run)
+    if args.neo4j_metrics_port:
+        serve(timeseries, args.neo4j_metrics_port)
+
     # Spin up enough workers to saturate the cpus or whatever is requested
     num_workers = cast(int, args.workers or cpu_count())
     workers = [
@@ -142,6 +179,12 @@ if __name__ == "__main__":
 
     # spin up some stats printing
     gevent.spawn(stats_printer(env.stats))
+    gevent.spawn(throughput_printer(env.stats))
+
+    # reconnect storms, on demand (kill -USR1) or on a schedule
+    gevent.signal_handler(signal.SIGUSR1, trigger_storm, runner)
+    if args.neo4j_storm_every:
+        gevent.spawn(storm_every, runner, args.neo4j_storm_every)
 
     # kick off the test...this doesn't return until spawn is complete.
     try:
@@ -168,3 +211,9 @@ if __name__ == "__main__":
         for w in workers:
             if w.is_alive():
                 w.kill()
+    finally:
+        # however the test ended, don't lose what we collected
+        print_throughput(env.stats)
+        if args.neo4j_metrics_file:
+            timeseries.flush()
+            timeseries.dump(args.neo4j_metrics_file)
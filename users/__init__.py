@@ -1,10 +1,12 @@
 from .base import Neo4jUser
 from .random import RandomReader, RandomWriter, RandomReaderWriter
 from .ldbc import LDBCUser
+from .churn import ChurnUser
 
 __all__ = [
     "Neo4jUser",
     "LDBCUser",
+    "ChurnUser",
     "RandomReader",
     "RandomWriter",
     "RandomReaderWriter"
@@ -4,21 +4,25 @@ Foundational classes and types.
 import logging
 
 from enum import Enum
+from itertools import count
 from time import perf_counter
+from types import MappingProxyType
 from uuid import uuid4
-from weakref import ref
 
 from locust import events, User
 from locust.env import Environment
 from neo4j import Driver, GraphDatabase, ManagedTransaction
 
-from collections.abc import Callable
-from typing import cast, Any, Dict, Optional, Tuple
+from .bolt import drain, rx_counter
+from .stats import Neo4jStats
+
+from typing import cast, Any, Dict, Mapping, Optional, Tuple, Union
 
 
 class Request(Enum):
     READ = "CypherRead"
     WRITE = "CypherWrite"
+    CONNECT = "BoltConnect"
 
 
 # using a global for now
@@ -29,6 +33,9 @@ DRIVER_CONFIG = {
     "connection_acquisition_timeout": 10, # seconds
 }
 
+# matches the driver's own default
+DEFAULT_FETCH_SIZE = 1000
+
 
 class Neo4jClient:
     """
@@ -41,35 +48,50 @@ class Neo4jClient:
             .driver(uri, auth=auth, **DRIVER_CONFIG) #type: ignore
         self.client_id = str(uuid4())
         self.pool_key = f"{auth[0]}@{uri}"
-
-    @classmethod
-    def _do_work(cls, cypher: str) -> Callable[..., Any]:
-        def _work(tx: ManagedTransaction, **kwargs: Any) -> Tuple[int, Any]:
-            result = tx.run(cypher, kwargs)
-            # brute force through all results
-            cnt = sum(1 for _ in iter(result))
-            return cnt, result.consume()
-        return _work
-
-    def _run_tx(self, req: Request, user_ref: ref[User],
-                cypher: str, db: str, **kwargs: Any) -> Tuple[int, int, bool]:
+        # request context shared by all high-density users of this client,
+        # read-only so one listener can't change it for everyone else
+        self.context: Mapping[str, Any] = \
+            MappingProxyType({"client_id": self.client_id})
+
+    @staticmethod
+    def _work(tx: ManagedTransaction, cypher: str,
+              params: Dict[str, Any]) -> Tuple[int, int]:
+        # Defined once instead of as a closure per call: a nested def
+        # re-evaluates its annotations every time it's created.
+        counter = rx_counter(tx)
+        rx_start = counter.rx_bytes
+        result = tx.run(cypher, params)
+        # brute force through all results
+        cnt = 0
+        for _ in result:
+            cnt += 1
+        result.consume()
+        return cnt, counter.rx_bytes - rx_start
+
+    @staticmethod
+    def _drain_work(tx: ManagedTransaction, cypher: str,
+                    params: Dict[str, Any]) -> Tuple[int, int]:
+        counter = rx_counter(tx)
+        rx_start = counter.rx_bytes
+        cnt = drain(tx.run(cypher, params))
+        return cnt, counter.rx_bytes - rx_start
+
+    def _run_tx(self, req: Request, user: "Neo4jUser", cypher: str, db: str,
+                fetch_size: int, discard: bool,
+                params: Dict[str, Any]) -> Tuple[int, int, bool]:
         err = None
-        delta, cnt, abort = 0, 0, False
+        delta, cnt, nbytes, abort = 0, 0, 0, False
         send_report = True
-        # todo: set env from pool during client creation
-        fire: Callable[..., Any] = (
-            user_ref().environment.events.request.fire #type: ignore
-        )
+        work = self._drain_work if discard else self._work
 
         start = perf_counter()
         try:
-            with self.driver.session(database=db) as session:
+            with self.driver.session(database=db,
+                                     fetch_size=fetch_size) as session:
                 if req is Request.READ:
-                    cnt, _ = session.read_transaction(
-                        self._do_work(cypher), **kwargs)
+                    cnt, nbytes = session.execute_read(work, cypher, params)
                 elif req is Request.WRITE:
-                    cnt, _ = session.write_transaction(
-                        self._do_work(cypher), **kwargs)
+                    cnt, nbytes = session.execute_write(work, cypher, params)
                 else:
                     raise Exception("oh crap")
             delta = int((perf_counter() - start) * 1000)
@@ -81,24 +103,27 @@ class Neo4jClient:
             err = e
 
         if send_report:
-            fire(request_type=str(req.value),
-                 name=cypher,
-                 response_time=delta,
-                 response_length=cnt, # should be bytes, but we're using rows
-                 exception=err,
-                 context = {
-                     "user_id": user_ref().user_id, # type: ignore
-                     "client_id": self.client_id
-                 })
+            user.environment.events.request.fire(
+                request_type=req.value,
+                name=cypher,
+                response_time=delta,
+                response_length=nbytes, # bytes off the wire
+                exception=err,
+                context=user._request_context()
+            )
+            if err is None:
+                Neo4jStats.record(req.value, cypher, cnt)
         return cnt, delta, abort
 
-    def read(self, user_ref: ref[User], cypher: str, db: str, **kwargs: Any) \
-            -> Tuple[int, int, bool]:
-        return self._run_tx(Request.READ, user_ref, cypher, db, **kwargs)
+    def read(self, user: "Neo4jUser", cypher: str, db: str, fetch_size: int,
+             discard: bool, params: Dict[str, Any]) -> Tuple[int, int, bool]:
+        return self._run_tx(Request.READ, user, cypher, db, fetch_size,
+                            discard, params)
 
-    def write(self, user_ref: ref[User], cypher: str, db: str, **kwargs: Any) \
-            -> Tuple[int, int, bool]:
-        return self._run_tx(Request.WRITE, user_ref, cypher, db, **kwargs)
+    def write(self, user: "Neo4jUser", cypher: str, db: str, fetch_size: int,
+              discard: bool, params: Dict[str, Any]) -> Tuple[int, int, bool]:
+        return self._run_tx(Request.WRITE, user, cypher, db, fetch_size,
+                            discard, params)
 
     def close(self) -> None:
         # todo: this is being called twice for some reason
@@ -183,6 +208,9 @@ class Neo4jPool:
             cls.refcnt_map[client_id] = cnt
 
 
+_user_ids = count(1)
+
+
 class Neo4jUser(User):
     """
     Represents an end-user that may perform a transaction to the database.
@@ -198,34 +226,68 @@ class Neo4jUser(User):
             raise ValueError("host cannot be empty!")
         if not env.parsed_options:
             raise ValueError("missing parsed options!")
-        self.auth = (
-            env.parsed_options.neo4j_user,
-            env.parsed_options.neo4j_pass
-        )
-        self.user_id = str(uuid4())
+        if self._high_density():
+            # small ints are far cheaper to hold 100k+ of than uuid strings
+            self.user_id: Union[int, str] = next(_user_ids)
+        else:
+            self.user_id = str(uuid4())
         self.client: Optional[Neo4jClient] = None
 
+    @property
+    def auth(self) -> Tuple[str, str]:
+        # not stored per user, it's the same for all of them
+        options = self.environment.parsed_options
+        return options.neo4j_user, options.neo4j_pass # type: ignore
+
+    def _high_density(self) -> bool:
+        return getattr(self.environment.parsed_options,
+                       "neo4j_high_density", False)
+
+    def _request_context(self) -> Mapping[str, Any]:
+        """
+        The context handed to request listeners. High-density users all
+        share their client's read-only context instead of getting their own.
+        """
+        client = cast(Neo4jClient, self.client)
+        if self._high_density():
+            return client.context
+        return {"user_id": self.user_id, "client_id": client.client_id}
+
     def read(self, cypher: str, db: str = "neo4j",
+             fetch_size: int = DEFAULT_FETCH_SIZE, discard: bool = False,
              **kwargs: Any) -> Tuple[int, int]:
-        """Higher order wrapper around Neo4jClient.read()"""
+        """
+        Higher order wrapper around Neo4jClient.read()
+
+        Records are pulled fetch_size at a time (-1 for all at once). With
+        discard set, they're streamed and counted but never materialized.
+        Any other keyword arguments become Cypher parameters, so a query
+        can't take parameters named db, fetch_size or discard this way.
+        """
         if not self.client:
             # bailout
             return -1, 0
 
-        cnt, delta, abort = self.client.read(ref(self), cypher, db, **kwargs)
+        cnt, delta, abort = self.client.read(self, cypher, db, fetch_size,
+                                             discard, kwargs)
         if abort:
             logging.debug(f"{self} aborting")
             self.on_stop()
         return cnt, delta
 
     def write(self, cypher: str, db: str = "neo4j",
+              fetch_size: int = DEFAULT_FETCH_SIZE, discard: bool = False,
               **kwargs: Any) -> Tuple[int, int]:
-        """Higher order wrapper around Neo4jClient.write()"""
+        """
+        Higher order wrapper around Neo4jClient.write(). Takes the same
+        options as read().
+        """
         if not self.client:
             # bailout
             return -1, 0
 
-        cnt, delta, abort = self.client.write(ref(self), cypher, db, **kwargs)
+        cnt, delta, abort = self.client.write(self, cypher, db, fetch_size,
+                                              discard, kwargs)
         if abort:
             logging.debug(f"{self} aborting")
             self.on_stop()
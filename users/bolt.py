@@ -0,0 +1,132 @@
+"""
+Hooks into the Neo4j Driver's Bolt layer for things its public API doesn't
+expose. These lean on driver internals, so they're pinned to the driver
+version in requirements.txt.
+"""
+from neo4j import Driver, ManagedTransaction, Result
+from neo4j._async_compat.network import BoltSocket
+from neo4j._sync.io import Bolt, Neo4jPool as RoutingPool
+from neo4j._exceptions import BoltHandshakeError
+
+from typing import Any, Optional, Tuple
+
+
+class RxCounter:
+    """
+    Wraps a Bolt connection's socket, counting every byte read off the wire
+    (chunk headers included) for the life of the connection.
+    """
+    __slots__ = ("_socket", "rx_bytes")
+
+    def __init__(self, socket: Any):
+        self._socket = socket
+        self.rx_bytes = 0
+
+    def recv_into(self, buffer: Any, nbytes: int) -> int:
+        n: int = self._socket.recv_into(buffer, nbytes)
+        self.rx_bytes += n
+        return n
+
+
+def rx_counter(tx: ManagedTransaction) -> RxCounter:
+    """Find (or install) the byte counter on a transaction's connection."""
+    inbox = tx._connection.inbox # type: ignore
+    counter = inbox._socket
+    if counter.__class__ is not RxCounter:
+        counter = RxCounter(counter)
+        inbox._socket = counter
+    return counter
+
+
+class _Discard:
+    """
+    Stands in for a Result's record buffer. The Result hands it a lazy
+    generator of Records per RECORD message, which we count and never run.
+    Always falsey so the Result keeps streaming instead of yielding.
+    """
+    __slots__ = ("rows",)
+
+    def __init__(self, rows: int = 0):
+        self.rows = rows
+
+    def __bool__(self) -> bool:
+        return False
+
+    def extend(self, records: Any) -> None:
+        self.rows += 1
+
+    def clear(self) -> None:
+        pass
+
+
+def drain(result: Result) -> int:
+    """
+    Stream every record of a Result off the wire, honoring its fetch_size,
+    without hydrating graph types or building Record objects. Returns the
+    number of rows.
+    """
+    # Hooks are shared with PULLs already in flight, so empty them in place.
+    result._hydration_scope.hydration_hooks.clear() # type: ignore
+    sink = _Discard(len(result._record_buffer)) # type: ignore
+    result._record_buffer = sink # type: ignore
+    for _ in result:
+        pass
+    result.consume()
+    return sink.rows
+
+
+class PhasedConnection:
+    """
+    Opens a Bolt connection the way a Driver's pool would, but one phase at a
+    time so each can be timed on its own. Borrows the address, TLS and other
+    settings from an existing Driver, without touching its pool.
+    """
+
+    def __init__(self, driver: Driver):
+        pool = driver._pool # type: ignore
+        self.address = pool.address
+        self.config = pool.pool_config
+        self.routing = isinstance(pool, RoutingPool)
+        self.socket: Optional[BoltSocket] = None
+        self.version: Tuple[int, int] = (0, 0)
+        self.connection: Optional[Bolt] = None
+
+    def handshake(self) -> None:
+        """TCP connect, TLS (if configured) and Bolt version negotiation."""
+        self.socket, self.version, _, _ = BoltSocket.connect(
+            self.address,
+            timeout=self.config.connection_timeout,
+            custom_resolver=self.config.resolver,
+            ssl_context=self.config.get_ssl_context(),
+            keep_alive=self.config.keep_alive,
+        )
+
+    def authenticate(self, auth: Tuple[str, str]) -> None:
+        """Send HELLO with our credentials."""
+        bolt_cls = Bolt.protocol_handlers(self.version).get(self.version)
+        if bolt_cls is None:
+            raise BoltHandshakeError(
+                f"unsupported Bolt version {self.version}",
+                address=self.address, request_data=None, response_data=None
+            )
+        routing_context = {"address": str(self.address)} \
+            if self.routing else None
+        self.connection = bolt_cls(
+            self.address, self.socket, self.config.max_connection_lifetime,
+            auth=auth, user_agent=self.config.user_agent,
+            routing_context=routing_context
+        )
+        self.connection.hello()
+
+    def route(self, db: str) -> None:
+        """Fetch a routing table, like a neo4j:// driver does on first use."""
+        if self.connection is None:
+            raise RuntimeError("can't route before authenticating")
+        self.connection.route(database=db)
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.close() # says GOODBYE
+        elif self.socket is not None:
+            BoltSocket.close_socket(self.socket)
+        self.connection, self.socket = None, None
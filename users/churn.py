@@ -0,0 +1,124 @@
+"""
+Connection churn and reconnect storms.
+"""
+import logging
+from time import perf_counter
+
+from gevent.event import Event
+
+from locust import constant, tag, task
+from locust.env import Environment
+
+from . import Neo4jUser
+from .base import Request
+from .bolt import PhasedConnection
+
+from collections.abc import Callable
+from typing import Any, Optional
+
+
+STORM_MESSAGE = "neo4j_storm"
+
+
+class ReconnectStorm:
+    """
+    Worker-wide trigger that makes every ChurnUser reconnect at once. Acts as
+    a 'static' instance, so 1 per Python interpreter.
+    """
+    event = Event()
+    count = 0
+
+    @classmethod
+    def wait(cls, timeout: Optional[float] = None) -> bool:
+        """Block until the next storm or the timeout. True if it stormed."""
+        return cls.event.wait(timeout)
+
+    @classmethod
+    def trigger(cls) -> None:
+        # swap first so users that wake up wait on the next storm
+        event, cls.event = cls.event, Event()
+        cls.count += 1
+        logging.info(f"ReconnectStorm: storm #{cls.count}")
+        event.set()
+
+
+def on_storm_message(environment: Environment, msg: Any,
+                     **kwargs: Any) -> None:
+    ReconnectStorm.trigger()
+
+
+def trigger_storm(runner: Any) -> None:
+    """Tell every worker to storm. Call from the master."""
+    logging.info("triggering reconnect storm")
+    runner.send_message(STORM_MESSAGE)
+
+
+class ChurnUser(Neo4jUser):
+    """
+    Holds a Bolt connection of its own and keeps tearing it down and opening
+    a new one, timing the handshake, auth and routing phases separately.
+    """
+    wait_time = constant(0)
+
+    def __init__(self, env: Environment):
+        super().__init__(env)
+        # reconnects per second per user, 0 means only reconnect on storms
+        self.churn_rate: float = getattr(env.parsed_options,
+                                         "neo4j_churn_rate", 1.0)
+        self.db: str = "neo4j"
+        self.connection: Optional[PhasedConnection] = None
+
+    def _timed(self, name: str, phase: Callable[..., None],
+               *args: Any) -> bool:
+        err = None
+        start = perf_counter()
+        try:
+            phase(*args)
+        except Exception as e:
+            err = e
+        self.environment.events.request.fire(
+            request_type=Request.CONNECT.value,
+            name=name,
+            response_time=(perf_counter() - start) * 1000,
+            response_length=0,
+            exception=err,
+            context=self._request_context()
+        )
+        return err is None
+
+    def connect(self) -> None:
+        if not self.client:
+            return
+
+        self.disconnect()
+        connection = PhasedConnection(self.client.driver)
+        self.connection = connection
+        ok = self._timed("handshake", connection.handshake) \
+            and self._timed("auth", connection.authenticate, self.auth) \
+            and (not connection.routing
+                 or self._timed("route", connection.route, self.db))
+        if not ok:
+            self.disconnect()
+
+    def disconnect(self) -> None:
+        if self.connection:
+            try:
+                self.connection.close()
+            except Exception as e:
+                logging.debug(f"{self} failed closing connection: {e}")
+            self.connection = None
+
+    @tag("churn")
+    @task
+    def churn(self) -> None:
+        interval = 1 / self.churn_rate if self.churn_rate > 0 else None
+        ReconnectStorm.wait(interval)
+        self.connect()
+
+    def on_start(self) -> None:
+        super().on_start()
+        self.connect()
+
+    def on_stop(self) -> None:
+        self.disconnect()
+        super().on_stop()
@@ -0,0 +1,98 @@
+"""
+Throughput reporting to go alongside Locust's own request stats.
+
+Locust already sums each request's response_length (wire bytes for us), but
+has nowhere to put row counts, so those ride along in worker reports.
+"""
+import gevent
+
+from locust.event import Events
+from locust.stats import (
+    console_logger, sort_stats, CONSOLE_STATS_INTERVAL_SEC, RequestStats
+)
+
+from collections.abc import Callable
+from typing import Any, Dict, Tuple
+
+
+class Neo4jStats:
+    """
+    Row counts per request type and name, keyed like Locust's own stats.
+    Acts as a 'static' instance, so 1 per Python interpreter. Workers hand
+    theirs off with every report, while the master keeps a running total.
+    """
+    rows: Dict[Tuple[str, str], int] = dict() # (type, name) -> rows
+
+    @classmethod
+    def record(cls, method: str, name: str, rows: int) -> None:
+        key = (method, name)
+        cls.rows[key] = cls.rows.get(key, 0) + rows
+
+    @classmethod
+    def on_report_to_master(cls, data: Dict[str, Any]) -> None:
+        # msgpack maps can't have tuple keys, so send [type, name, rows]
+        data["neo4j_rows"] = [
+            [method, name, rows] for (method, name), rows in cls.rows.items()
+        ]
+        cls.rows = dict()
+
+    @classmethod
+    def on_worker_report(cls, data: Dict[str, Any]) -> None:
+        for method, name, rows in data.get("neo4j_rows", []):
+            cls.record(method, name, rows)
+
+    @classmethod
+    def on_reset_stats(cls) -> None:
+        cls.rows = dict()
+
+
+def on_report_to_master(client_id: str, data: Dict[str, Any]) -> None:
+    Neo4jStats.on_report_to_master(data)
+
+
+def on_worker_report(client_id: str, data: Dict[str, Any]) -> None:
+    Neo4jStats.on_worker_report(data)
+
+
+def on_reset_stats() -> None:
+    Neo4jStats.on_reset_stats()
+
+
+def add_listeners(events: Events) -> None:
+    """Hook Neo4jStats up to an Environment's events, master or worker."""
+    events.report_to_master.add_listener(on_report_to_master)
+    events.worker_report.add_listener(on_worker_report)
+    events.reset_stats.add_listener(on_reset_stats)
+
+
+def print_throughput(stats: RequestStats) -> None:
+    console_logger.info(
+        f"{'Type':<12} {'Name':<60} {'MB/s':>10} {'rows/s':>12} "
+        f"{'bytes/row':>10}"
+    )
+    # rates are over the whole run, same as Locust's own total_rps
+    if not stats.total.last_request_timestamp:
+        return
+    elapsed = stats.total.last_request_timestamp - stats.total.start_time
+    elapsed = max(elapsed, 1e-3)
+    for entry in sort_stats(stats.entries):
+        if not entry.total_content_length:
+            continue # nothing streamed, e.g. connection churn
+        rows = Neo4jStats.rows.get((entry.method, entry.name), 0)
+        per_row = entry.total_content_length / rows if rows else 0
+        name = " ".join(entry.name.split())
+        console_logger.info(
+            f"{entry.method:<12} {name[:60]:<60} "
+            f"{entry.total_content_length / elapsed / 1_000_000:>10.2f} "
+            f"{rows / elapsed:>12.1f} {per_row:>10.1f}"
+        )
+    console_logger.info("")
+
+
+def throughput_printer(stats: RequestStats) -> Callable[[], None]:
+    def throughput_printer_func() -> None:
+        while True:
+            print_throughput(stats)
+            gevent.sleep(CONSOLE_STATS_INTERVAL_SEC)
+
+    return throughput_printer_func
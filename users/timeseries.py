@@ -0,0 +1,289 @@
+"""
+Rolling, fixed-memory time series of per-query stats, kept on the master.
+
+Each series is a handful of tiers, e.g. 15s points for the last hour, 1m
+points for the last day and 10m points for the last week. Every tier is a
+fixed length deque, so memory stays flat no matter how long a soak runs.
+Percentiles are exact at every resolution: each tier merges Locust's
+response time histograms for the span of its next point, then throws the
+histogram away once the point is written.
+"""
+import gzip
+import json
+import logging
+import time
+
+from collections import deque
+
+import gevent
+from gevent.pywsgi import WSGIServer
+
+from locust.runners import WORKER_REPORT_INTERVAL
+from locust.stats import calculate_response_time_percentile
+from locust.util.timespan import parse_timespan
+
+from collections.abc import Callable, Iterable
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+
+# 15s points for an hour, 1m points for a day, 10m points for a week
+DEFAULT_RETENTION = "15s:1h,1m:24h,10m:168h"
+
+# (end timestamp, requests, failures, p50, p95, p99, max) with times in ms,
+# and None for percentiles of an empty interval
+Point = Tuple[int, int, int, Optional[int], Optional[int], Optional[int],
+              Optional[int]]
+Key = Tuple[str, str] # (request type, name)
+
+# metric -> (Prometheus type, help), all over the latest base interval
+METRICS = {
+    "requests_per_second": ("gauge", "Requests per second."),
+    "failures_per_second": ("gauge", "Failed requests per second."),
+    "error_ratio": ("gauge", "Failed requests over all requests."),
+    "response_time_ms": ("summary", "Response time percentiles in ms."),
+    "response_time_max_ms": ("gauge", "Slowest response time in ms."),
+}
+
+
+def parse_retention(spec: str) -> List[Tuple[int, int]]:
+    """
+    Parse "step:retention,..." timespans (like "15s:1h,1m:24h") into a list
+    of (step, retention) seconds. Every step must be a multiple of the first,
+    and the first a multiple of the worker report interval. Otherwise points
+    would alternate between holding more and fewer reports.
+    """
+    tiers = []
+    for part in spec.split(","):
+        step, _, retention = part.partition(":")
+        tiers.append((parse_timespan(step), parse_timespan(retention)))
+    base = tiers[0][0]
+    if base < 1:
+        raise ValueError("resolution must be at least 1s")
+    if base % WORKER_REPORT_INTERVAL:
+        raise ValueError(f"{base}s isn't a multiple of the "
+                         f"{WORKER_REPORT_INTERVAL:g}s worker report interval")
+    for step, retention in tiers:
+        if step % base:
+            raise ValueError(f"{step}s isn't a multiple of {base}s")
+        if retention < step:
+            raise ValueError(f"{retention}s retention is under a {step}s step")
+    return tiers
+
+
+class Interval:
+    """Requests seen over some span of time."""
+    __slots__ = ("requests", "failures", "max", "response_times")
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.failures = 0
+        self.max = 0
+        self.response_times: Dict[int, int] = dict() # rounded ms -> count
+
+    def add(self, requests: int, failures: int, max_rt: int,
+            response_times: Dict[int, int]) -> None:
+        self.requests += requests
+        self.failures += failures
+        self.max = max(self.max, max_rt)
+        for rt, cnt in response_times.items():
+            self.response_times[rt] = self.response_times.get(rt, 0) + cnt
+
+    def merge(self, other: "Interval") -> None:
+        self.add(other.requests, other.failures, other.max,
+                 other.response_times)
+
+    def point(self, ts: int) -> Point:
+        if not self.requests:
+            return (ts, 0, self.failures, None, None, None, None)
+        rts, n = self.response_times, self.requests
+        return (
+            ts, n, self.failures,
+            calculate_response_time_percentile(rts, n, 0.50),
+            calculate_response_time_percentile(rts, n, 0.95),
+            calculate_response_time_percentile(rts, n, 0.99),
+            round(self.max), # round, not truncate, as the histogram does
+        )
+
+
+class Tier:
+    __slots__ = ("step", "span", "points", "pending")
+
+    def __init__(self, step: int, retention: int, base: int):
+        self.step = step
+        self.span = step // base # base intervals per point
+        self.points: Deque[Point] = deque(maxlen=retention // step)
+        self.pending = Interval()
+
+
+class TimeSeries:
+    """
+    Listens to worker reports on the master and rolls them up into a fixed
+    number of points per query. Call run() in a greenlet to keep the clock
+    ticking.
+    """
+
+    def __init__(self, retention: List[Tuple[int, int]],
+                 max_series: int = 256):
+        self.retention = retention
+        self.base = retention[0][0]
+        self.max_series = max_series
+        self.overflowed = False
+        self.current: Dict[Key, Interval] = dict()
+        self.series: Dict[Key, List[Tier]] = dict()
+        self.ticks = 0
+
+    def _interval(self, key: Key) -> Optional[Interval]:
+        if key not in self.series:
+            if len(self.series) >= self.max_series:
+                if not self.overflowed:
+                    logging.warning(
+                        f"TimeSeries: over {self.max_series} series, "
+                        "ignoring new queries"
+                    )
+                    self.overflowed = True
+                return None
+            self.series[key] = [
+                Tier(step, retention, self.base)
+                for step, retention in self.retention
+            ]
+        if key not in self.current:
+            self.current[key] = Interval()
+        return self.current[key]
+
+    def on_worker_report(self, client_id: str, data: Dict[str, Any],
+                         **kwargs: Any) -> None:
+        entries: Iterable[Dict[str, Any]] = data.get("stats", [])
+        if "stats_total" in data:
+            entries = [*entries, data["stats_total"]]
+        for entry in entries:
+            # the total's method starts out None, then becomes ""
+            key = (entry["method"] or "", entry["name"])
+            interval = self._interval(key)
+            if interval is not None:
+                interval.add(entry["num_requests"], entry["num_failures"],
+                             entry["max_response_time"],
+                             entry["response_times"])
+
+    def tick(self, ts: Optional[int] = None) -> None:
+        """Close the current interval, stamping its points with ts."""
+        ts = int(time.time()) if ts is None else ts
+        self.ticks += 1
+        current, self.current = self.current, dict()
+        for key, tiers in self.series.items():
+            interval = current.get(key)
+            for tier in tiers:
+                if interval is not None:
+                    tier.pending.merge(interval)
+                if self.ticks % tier.span == 0:
+                    tier.points.append(tier.pending.point(ts))
+                    tier.pending = Interval()
+
+    def flush(self, ts: Optional[int] = None) -> None:
+        """
+        Close the current interval, then write out every tier's partly
+        filled point too, so a dump at the end of a run loses nothing.
+        Coarser tiers are left out of step, so only call this at the end.
+        """
+        ts = int(time.time()) if ts is None else ts
+        self.tick(ts)
+        for tiers in self.series.values():
+            for tier in tiers:
+                if self.ticks % tier.span:
+                    tier.points.append(tier.pending.point(ts))
+                    tier.pending = Interval()
+
+    def run(self) -> None:
+        # line ticks up with the wall clock so points land on round times
+        while True:
+            now = time.time()
+            gevent.sleep(self.base - now % self.base)
+            self.tick(int(round(time.time() / self.base) * self.base))
+
+    def latest(self) -> Iterable[Tuple[Key, Point]]:
+        for key, tiers in self.series.items():
+            if tiers[0].points:
+                yield key, tiers[0].points[-1]
+
+    def render(self) -> str:
+        """The latest base interval, in Prometheus text format."""
+        metrics: Dict[str, List[str]] = {metric: [] for metric in METRICS}
+        for (method, name), point in self.latest():
+            _, requests, failures, p50, p95, p99, max_rt = point
+            labels = f'type="{_escape(method)}",name="{_escape(name)}"'
+            ratio = failures / requests if requests else 0.0
+            metrics["requests_per_second"].append(
+                f"{{{labels}}} {requests / self.base}")
+            metrics["failures_per_second"].append(
+                f"{{{labels}}} {failures / self.base}")
+            metrics["error_ratio"].append(f"{{{labels}}} {ratio}")
+            for quantile, value in (("0.5", p50), ("0.95", p95),
+                                    ("0.99", p99)):
+                metrics["response_time_ms"].append(
+                    f'{{{labels},quantile="{quantile}"}} {_number(value)}')
+            metrics["response_time_max_ms"].append(
+                f"{{{labels}}} {_number(max_rt)}")
+
+        lines = [
+            "# HELP neo4j_locust_interval_seconds Length of each interval.",
+            "# TYPE neo4j_locust_interval_seconds gauge",
+            f"neo4j_locust_interval_seconds {self.base}",
+        ]
+        for metric, samples in metrics.items():
+            kind, help_text = METRICS[metric]
+            lines.append(f"# HELP neo4j_locust_{metric} {help_text}")
+            lines.append(f"# TYPE neo4j_locust_{metric} {kind}")
+            lines.extend(f"neo4j_locust_{metric}{s}" for s in samples)
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str) -> None:
+        """Write every tier to a JSON file, gzipped if path ends in .gz"""
+        doc = {
+            "fields": ["ts", "requests", "failures",
+                       "p50_ms", "p95_ms", "p99_ms", "max_ms"],
+            "tiers": [
+                {
+                    "step": step,
+                    "series": [
+                        {"type": method, "name": name,
+                         "points": list(tiers[i].points)}
+                        for (method, name), tiers in self.series.items()
+                    ],
+                }
+                for i, (step, _) in enumerate(self.retention)
+            ],
+        }
+        data = json.dumps(doc, separators=(",", ":")).encode("utf-8")
+        if path.endswith(".gz"):
+            data = gzip.compress(data)
+        with open(path, "wb") as f:
+            f.write(data)
+        logging.info(f"TimeSeries: wrote {len(data)} bytes to {path}")
+
+
+def _escape(value: str) -> str:
+    value = " ".join(value.split()) # cypher is usually multi-line
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _number(value: Optional[int]) -> str:
+    return "NaN" if value is None else str(value)
+
+
+def serve(timeseries: TimeSeries, port: int) -> WSGIServer:
+    """Serve the latest interval at http://127.0.0.1:<port>/metrics"""
+    def app(environ: Dict[str, Any],
+            start_response: Callable[..., Any]) -> List[bytes]:
+        if environ.get("PATH_INFO") != "/metrics":
+            start_response("404 Not Found", [("Content-Type", "text/plain")])
+            return [b"not found\n"]
+        body = timeseries.render().encode("utf-8")
+        start_response("200 OK", [
+            ("Content-Type", "text/plain; version=0.0.4; charset=utf-8"),
+            ("Content-Length", str(len(body))),
+        ])
+        return [body]
+
+    server = WSGIServer(("127.0.0.1", port), app, log=None)
+    server.start()
+    logging.info(f"serving metrics on http://127.0.0.1:{port}/metrics")
+    return server